@@ -65,8 +65,8 @@ impl Apath {
             Ordering::Greater => false,
             Ordering::Equal => self.0 == a.0,
             Ordering::Less => {
-                a.0.starts_with(&self.0)
-                    && (self.0.ends_with('/') || a.0.chars().nth(self.0.len()) == Some('/'))
+                // `len` is a byte offset, so look at the byte there rather than walking chars.
+                a.0.starts_with(&self.0) && (self.0.ends_with('/') || a.0.as_bytes()[len] == b'/')
             }
         }
     }
@@ -25,7 +25,6 @@ use serde::{Deserialize, Serialize};
 
 use crate::blockhash::BlockHash;
 use crate::errors::Error;
-use crate::jsonio::{read_json, write_json};
 use crate::kind::Kind;
 use crate::misc::remove_item;
 use crate::stats::ValidateStats;
@@ -35,6 +34,14 @@ use crate::transport::{DirEntry, Transport};
 use crate::*;
 
 const HEADER_FILENAME: &str = "CONSERVE";
+
+/// The exact serialized form of the header written by this version, as `write_json` would
+/// produce it for an `ArchiveHeader` of `ARCHIVE_VERSION`.
+///
+/// Archives written by Conserve have exactly this content, so it can be written and
+/// checked without going through serde.
+const HEADER_CONTENT: &[u8] = b"{\"conserve_archive_version\":\"0.6\"}\n";
+
 static BLOCK_DIR: &str = "d";
 
 /// An archive holding backup material.
@@ -73,13 +80,12 @@ impl Archive {
             return Err(Error::NewArchiveDirectoryNotEmpty);
         }
         let block_dir = BlockDir::create(transport.sub_transport(BLOCK_DIR))?;
-        write_json(
-            &transport,
-            HEADER_FILENAME,
-            &ArchiveHeader {
-                conserve_archive_version: String::from(ARCHIVE_VERSION),
-            },
-        )?;
+        transport
+            .write_file(HEADER_FILENAME, HEADER_CONTENT)
+            .map_err(|source| Error::WriteMetadata {
+                path: HEADER_FILENAME.to_owned(),
+                source,
+            })?;
         Ok(Archive {
             block_dir,
             transport,
@@ -94,18 +100,25 @@ impl Archive {
     }
 
     pub fn open(transport: Box<dyn Transport>) -> Result<Archive> {
-        let header: ArchiveHeader =
-            read_json(&transport, HEADER_FILENAME).map_err(|err| match err {
-                Error::IOError { source } if source.kind() == ErrorKind::NotFound => {
-                    Error::NotAnArchive {}
-                }
-                Error::IOError { source } => Error::ReadArchiveHeader { source },
-                other => other,
+        let mut header_bytes = Vec::new();
+        transport
+            .read_file(HEADER_FILENAME, &mut header_bytes)
+            .map_err(|source| match source.kind() {
+                ErrorKind::NotFound => Error::NotAnArchive {},
+                _ => Error::ReadArchiveHeader { source },
             })?;
-        if header.conserve_archive_version != ARCHIVE_VERSION {
-            return Err(Error::UnsupportedArchiveVersion {
-                version: header.conserve_archive_version,
-            });
+        // Only parse the json if the header isn't exactly what this version writes.
+        if header_bytes != HEADER_CONTENT {
+            let header: ArchiveHeader =
+                serde_json::from_slice(&header_bytes).map_err(|source| Error::DeserializeJson {
+                    source,
+                    path: HEADER_FILENAME.into(),
+                })?;
+            if header.conserve_archive_version != ARCHIVE_VERSION {
+                return Err(Error::UnsupportedArchiveVersion {
+                    version: header.conserve_archive_version,
+                });
+            }
         }
         let block_dir = BlockDir::open(transport.sub_transport(BLOCK_DIR));
         Ok(Archive {
@@ -188,10 +201,11 @@ impl Archive {
 
     /// Return the last completely-written band id, if any.
     pub fn last_complete_band(&self) -> Result<Option<Band>> {
+        // Check for the tail before opening, so that incomplete bands are skipped
+        // without reading and parsing their heads.
         for id in self.list_band_ids()?.iter().rev() {
-            let b = Band::open(self, &id)?;
-            if b.is_closed()? {
-                return Ok(Some(b));
+            if self.band_is_closed(&id)? {
+                return Ok(Some(Band::open(self, &id)?));
             }
         }
         Ok(None)
@@ -211,9 +225,7 @@ impl Archive {
             .enumerate()
             .inspect(move |(i, _)| pb_lock.lock().unwrap().set_fraction(*i, num_bands))
             .map(move |(_i, band_id)| Band::open(&archive, &band_id).expect("Failed to open band"))
-            .flat_map_iter(|band| band.index().iter_entries())
-            .flat_map_iter(|entry| entry.addrs)
-            .map(|addr| addr.hash)
+            .flat_map_iter(|band| band.index().iter_block_hashes())
             .collect())
     }
 
@@ -468,6 +480,16 @@ mod tests {
         temp.close().unwrap();
     }
 
+    #[test]
+    fn header_content_matches_serialized_header() {
+        let mut json = serde_json::to_string(&ArchiveHeader {
+            conserve_archive_version: ARCHIVE_VERSION.to_owned(),
+        })
+        .unwrap();
+        json.push('\n');
+        assert_eq!(json.as_bytes(), HEADER_CONTENT);
+    }
+
     /// A new archive contains just one header file.
     /// The header is readable json containing only a version number.
     #[test]
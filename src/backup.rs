@@ -21,6 +21,7 @@ use globset::GlobSet;
 use itertools::Itertools;
 
 use crate::blockdir::Address;
+use crate::compress::snappy::Compressor;
 use crate::io::read_with_retries;
 use crate::stats::BackupStats;
 use crate::tree::ReadTree;
@@ -77,7 +78,7 @@ pub fn backup(
     let entry_iter = source.iter_entries(None, options.excludes.clone())?;
     for entry_group in entry_iter.chunks(options.max_entries_per_hunk).into_iter() {
         for entry in entry_group {
-            progress_bar.set_filename(entry.apath().to_string());
+            progress_bar.set_filename(entry.apath());
             if let Err(e) = writer.copy_entry(&entry, source) {
                 ui::show_error(&e);
                 stats.errors += 1;
@@ -106,6 +107,12 @@ struct BackupWriter {
 
     file_combiner: FileCombiner,
 
+    /// Buffer for reading large files, reused across files to avoid reallocating it.
+    file_buf: Vec<u8>,
+
+    /// Compressor for blocks of large files, reused across blocks.
+    compressor: Compressor,
+
     options: BackupOptions,
 }
 
@@ -117,13 +124,15 @@ impl BackupWriter {
         if gc_lock::GarbageCollectionLock::is_locked(archive)? {
             return Err(Error::GarbageCollectionLockHeld);
         }
-        let basis_index = archive.last_band_id()?.map(|band_id| {
+        let last_band_id = archive.last_band_id()?;
+        let basis_index = last_band_id.as_ref().map(|band_id| {
             archive
-                .iter_stitched_index_hunks(&band_id)
+                .iter_stitched_index_hunks(band_id)
                 .iter_entries(None, excludes_nothing())
         });
         // Create the new band only after finding the basis band!
-        let band = Band::create(archive)?;
+        let band_id = last_band_id.map_or_else(BandId::zero, |b| b.next_sibling());
+        let band = Band::create_with_id(archive, band_id)?;
         let index_builder = band.index_builder();
         Ok(BackupWriter {
             band,
@@ -132,6 +141,8 @@ impl BackupWriter {
             stats: BackupStats::default(),
             basis_index,
             file_combiner: FileCombiner::new(archive.block_dir().clone()),
+            file_buf: Vec::new(),
+            compressor: Compressor::new(),
             options,
         })
     }
@@ -222,7 +233,9 @@ impl BackupWriter {
         let addrs = store_file_content(
             &apath,
             &mut read_source,
+            &mut self.file_buf,
             &mut self.block_dir,
+            &mut self.compressor,
             &mut self.stats,
         )?;
         self.index_builder.push_entry(IndexEntry {
@@ -248,13 +261,14 @@ impl BackupWriter {
 fn store_file_content(
     apath: &Apath,
     from_file: &mut dyn Read,
+    buffer: &mut Vec<u8>,
     block_dir: &mut BlockDir,
+    compressor: &mut Compressor,
     stats: &mut BackupStats,
 ) -> Result<Vec<Address>> {
-    let mut buffer = Vec::new();
     let mut addresses = Vec::<Address>::with_capacity(1);
     loop {
-        read_with_retries(&mut buffer, MAX_BLOCK_SIZE, from_file).map_err(|source| {
+        read_with_retries(buffer, MAX_BLOCK_SIZE, from_file).map_err(|source| {
             Error::StoreFile {
                 apath: apath.to_owned(),
                 source,
@@ -263,7 +277,7 @@ fn store_file_content(
         if buffer.is_empty() {
             break;
         }
-        let hash = block_dir.store_or_deduplicate(buffer.as_slice(), stats)?;
+        let hash = block_dir.store_or_deduplicate(buffer.as_slice(), compressor, stats)?;
         addresses.push(Address {
             hash,
             start: 0,
@@ -290,6 +304,7 @@ struct FileCombiner {
     finished: Vec<IndexEntry>,
     stats: BackupStats,
     block_dir: BlockDir,
+    compressor: Compressor,
 }
 
 /// A file in the process of being written into a combined block.
@@ -314,6 +329,7 @@ impl FileCombiner {
             queue: Vec::new(),
             finished: Vec::new(),
             stats: BackupStats::default(),
+            compressor: Compressor::new(),
         }
     }
 
@@ -340,9 +356,11 @@ impl FileCombiner {
             debug_assert!(self.buf.is_empty());
             return Ok(());
         }
-        let hash = self
-            .block_dir
-            .store_or_deduplicate(&self.buf, &mut self.stats)?;
+        let hash = self.block_dir.store_or_deduplicate(
+            &self.buf,
+            &mut self.compressor,
+            &mut self.stats,
+        )?;
         self.stats.combined_blocks += 1;
         self.buf.clear();
         self.finished
@@ -373,14 +391,23 @@ impl FileCombiner {
             self.finished.push(index_entry);
             return Ok(());
         }
-        self.buf.resize(start + expected_len, 0);
-        let len = from_file
-            .read(&mut self.buf[start..])
-            .map_err(|source| Error::StoreFile {
-                apath: live_entry.apath().to_owned(),
-                source,
-            })?;
-        self.buf.truncate(start + len);
+        // Read straight onto the end of the combine buffer, without zero-filling it first,
+        // and keep reading until the expected length or EOF in case of short reads.
+        self.buf.reserve(expected_len);
+        let len = match from_file
+            .take(expected_len as u64)
+            .read_to_end(&mut self.buf)
+        {
+            Ok(len) => len,
+            Err(source) => {
+                // Don't leave a partial file in the buffer.
+                self.buf.truncate(start);
+                return Err(Error::StoreFile {
+                    apath: live_entry.apath().to_owned(),
+                    source,
+                });
+            }
+        };
         if len == 0 {
             self.stats.empty_files += 1;
             self.finished.push(index_entry);
@@ -402,3 +429,48 @@ impl FileCombiner {
         }
     }
 }
+
+#[cfg(test)]
+mod test {
+    use std::fs::{File, OpenOptions};
+
+    use tempfile::TempDir;
+
+    use super::*;
+    use crate::test_fixtures::TreeFixture;
+
+    #[test]
+    fn file_shrunk_after_stat_stores_only_what_was_read() {
+        let tf = TreeFixture::new();
+        let path = tf.create_file_with_contents("shrinks", b"0123456789");
+        let entry = tf
+            .live_tree()
+            .iter_entries(None, excludes_nothing())
+            .unwrap()
+            .find(|entry| entry.apath() == "/shrinks")
+            .unwrap();
+        assert_eq!(entry.size(), Some(10));
+        // The file gets shorter after it's listed but before it's read.
+        OpenOptions::new()
+            .write(true)
+            .open(&path)
+            .unwrap()
+            .set_len(4)
+            .unwrap();
+
+        let blockdir_temp = TempDir::new().unwrap();
+        let block_dir = BlockDir::create_path(blockdir_temp.path()).unwrap();
+        let mut combiner = FileCombiner::new(block_dir.clone());
+        combiner
+            .push_file(&entry, &mut File::open(&path).unwrap())
+            .unwrap();
+        let (_stats, entries) = combiner.drain().unwrap();
+
+        assert_eq!(entries.len(), 1);
+        let addr = &entries[0].addrs[0];
+        assert_eq!(addr.start, 0);
+        assert_eq!(addr.len, 4);
+        let (content, _sizes) = block_dir.get_block_content(&addr.hash).unwrap();
+        assert_eq!(content, b"0123");
+    }
+}
@@ -21,6 +21,8 @@
 //! To read a consistent tree possibly composed from several incremental backups, use
 //! StoredTree rather than the Band itself.
 
+use std::io::ErrorKind;
+
 use chrono::{DateTime, TimeZone, Utc};
 use serde::{Deserialize, Serialize};
 
@@ -63,6 +65,9 @@ pub struct Band {
 
     /// Transport pointing to the archive directory.
     transport: Box<dyn Transport>,
+
+    /// Parsed head of this band, kept from when it was opened or created.
+    head: Head,
 }
 
 #[derive(Debug, Serialize, Deserialize)]
@@ -112,6 +117,13 @@ impl Band {
         let band_id = archive
             .last_band_id()?
             .map_or_else(BandId::zero, |b| b.next_sibling());
+        Band::create_with_id(archive, band_id)
+    }
+
+    /// Make a new band with a given id, which the caller has already chosen.
+    ///
+    /// This lets callers that already listed the archive's bands avoid listing them again.
+    pub(crate) fn create_with_id(archive: &Archive, band_id: BandId) -> Result<Band> {
         let transport: Box<dyn Transport> = archive.transport().sub_transport(&band_id.to_string());
         transport
             .create_dir("")
@@ -122,7 +134,11 @@ impl Band {
             band_format_version: Some(BAND_FORMAT_VERSION.to_owned()),
         };
         write_json(&transport, BAND_HEAD_FILENAME, &head)?;
-        Ok(Band { band_id, transport })
+        Ok(Band {
+            band_id,
+            transport,
+            head,
+        })
     }
 
     /// Mark this band closed: no more blocks should be written after this.
@@ -140,23 +156,23 @@ impl Band {
     /// Open the band with the given id.
     pub fn open(archive: &Archive, band_id: &BandId) -> Result<Band> {
         let transport: Box<dyn Transport> = archive.transport().sub_transport(&band_id.to_string());
-        let new = Band {
-            band_id: band_id.to_owned(),
-            transport,
-        };
-        let head = new.read_head()?;
-        if let Some(version) = head.band_format_version {
-            if !band_version_supported(&version) {
+        let head: Head = read_json(&transport, BAND_HEAD_FILENAME)?;
+        if let Some(version) = &head.band_format_version {
+            if !band_version_supported(version) {
                 return Err(Error::UnsupportedBandVersion {
                     band_id: band_id.to_owned(),
-                    version,
+                    version: version.to_owned(),
                 });
             }
         } else {
             // Unmarked, old bands, are accepted for now. In the next archive
             // version, band version markers ought to become mandatory.
         }
-        Ok(new)
+        Ok(Band {
+            band_id: band_id.to_owned(),
+            transport,
+            head,
+        })
     }
 
     /// Delete a band.
@@ -190,31 +206,23 @@ impl Band {
         IndexRead::open(self.transport.sub_transport(INDEX_DIR))
     }
 
-    fn read_head(&self) -> Result<Head> {
-        read_json(&self.transport, BAND_HEAD_FILENAME)
-    }
-
     fn read_tail(&self) -> Result<Option<Tail>> {
-        if self
-            .transport
-            .exists(BAND_TAIL_FILENAME)
-            .map_err(Error::from)?
-        {
-            Ok(Some(read_json(&self.transport, BAND_TAIL_FILENAME)?))
-        } else {
-            Ok(None)
+        // Just try to read it, rather than checking first whether it exists.
+        match read_json(&self.transport, BAND_TAIL_FILENAME) {
+            Ok(tail) => Ok(Some(tail)),
+            Err(Error::IOError { source }) if source.kind() == ErrorKind::NotFound => Ok(None),
+            Err(err) => Err(err),
         }
     }
 
     /// Return info about the state of this band.
     pub fn get_info(&self) -> Result<Info> {
-        let head = self.read_head()?;
-        let is_closed = self.is_closed()?;
+        // The head was already read when the band was opened; only the tail may have changed.
         let tail_option = self.read_tail()?;
         Ok(Info {
             id: self.band_id.clone(),
-            is_closed,
-            start_time: Utc.timestamp(head.start_time, 0),
+            is_closed: tail_option.is_some(),
+            start_time: Utc.timestamp(self.head.start_time, 0),
             end_time: tail_option
                 .as_ref()
                 .map(|tail| Utc.timestamp(tail.end_time, 0)),
@@ -63,6 +63,18 @@ impl BandId {
             Some(BandId::new(&[self.seqs[0] - 1]))
         }
     }
+
+    /// Write the string form of this id, without any padding.
+    fn write_to<W: fmt::Write>(&self, w: &mut W) -> fmt::Result {
+        w.write_char('b')?;
+        for (i, s) in self.seqs.iter().enumerate() {
+            if i > 0 {
+                w.write_char('-')?;
+            }
+            write!(w, "{:04}", s)?;
+        }
+        Ok(())
+    }
 }
 
 impl FromStr for BandId {
@@ -99,14 +111,14 @@ impl fmt::Display for BandId {
     /// Numbers are zero-padded to what should normally be a reasonable length,
     /// but they can be longer.
     fn fmt(&self, f: &mut fmt::Formatter) -> fmt::Result {
-        let mut result = String::with_capacity(self.seqs.len() * 5);
-        result.push('b');
-        for s in &self.seqs {
-            result.push_str(&format!("{:04}-", s));
+        if f.width().is_none() && f.precision().is_none() {
+            // Nothing to pad, so write straight through without building a temporary string.
+            self.write_to(f)
+        } else {
+            let mut result = String::with_capacity(self.seqs.len() * 5);
+            self.write_to(&mut result)?;
+            f.pad(&result)
         }
-        result.pop(); // remove the last dash
-        result.shrink_to_fit();
-        f.pad(&result)
     }
 }
 
@@ -125,6 +137,19 @@ mod tests {
         assert_eq!(BandId::new(&[1]), BandId::new(&[1]))
     }
 
+    #[test]
+    fn ordering_is_numeric() {
+        // Bands sort by their parsed sequence numbers, not by their string form: an
+        // unpadded longer number must still sort after shorter ones.
+        let mut ids: Vec<BandId> = ["b10000", "b0002", "b0010", "b9999", "b0002-0001"]
+            .iter()
+            .map(|s| s.parse().unwrap())
+            .collect();
+        ids.sort_unstable();
+        let strs: Vec<String> = ids.iter().map(BandId::to_string).collect();
+        assert_eq!(strs, ["b0002", "b0002-0001", "b0010", "b9999", "b10000"]);
+    }
+
     #[test]
     fn zero() {
         assert_eq!(BandId::zero().to_string(), "b0000");
@@ -27,7 +27,6 @@ use std::io;
 use std::path::Path;
 use std::sync::Mutex;
 
-use blake2_rfc::blake2b;
 use blake2_rfc::blake2b::Blake2b;
 use rayon::prelude::*;
 use serde::{Deserialize, Serialize};
@@ -77,8 +76,12 @@ fn subdir_relpath(block_hash: &str) -> &str {
 
 /// Return the transport-relative file for a given hash.
 fn block_relpath(hash: &BlockHash) -> String {
-    let hash_hex = hash.to_string();
-    format!("{}/{}", subdir_relpath(&hash_hex), hash_hex)
+    hex_block_relpath(&hash.to_string())
+}
+
+/// Return the transport-relative file for a hash that's already in hex.
+fn hex_block_relpath(hash_hex: &str) -> String {
+    format!("{}/{}", subdir_relpath(hash_hex), hash_hex)
 }
 
 impl BlockDir {
@@ -103,45 +106,58 @@ impl BlockDir {
     }
 
     /// Returns the number of compressed bytes.
-    pub(crate) fn compress_and_store(&mut self, in_buf: &[u8], hash: &BlockHash) -> Result<u64> {
-        // TODO: Move this to a BlockWriter, which can hold a reusable buffer.
-        let mut compressor = Compressor::new();
+    ///
+    /// The caller provides the compressor, so that its buffers can be reused across blocks.
+    pub(crate) fn compress_and_store(
+        &mut self,
+        in_buf: &[u8],
+        hash: &BlockHash,
+        compressor: &mut Compressor,
+    ) -> Result<u64> {
         let compressed = compressor.compress(&in_buf)?;
         let comp_len: u64 = compressed.len().try_into().unwrap();
         let hex_hash = hash.to_string();
-        let relpath = block_relpath(hash);
-        self.transport.create_dir(subdir_relpath(&hex_hash))?;
-        self.transport
-            .write_file(&relpath, compressed)
-            .or_else(|io_err| {
-                if io_err.kind() == io::ErrorKind::AlreadyExists {
-                    // Perhaps it was simultaneously created by another thread or process.
-                    ui::problem(&format!(
-                        "Unexpected late detection of existing block {:?}",
-                        hex_hash
-                    ));
-                    Ok(())
-                } else {
-                    Err(Error::WriteBlock {
-                        hash: hex_hash,
-                        source: io_err,
-                    })
-                }
-            })?;
+        let relpath = hex_block_relpath(&hex_hash);
+        // Most subdirectories already exist once the archive has a few blocks, so try the
+        // write first and only create the subdirectory if it's missing. This relies on
+        // `Transport::write_file` returning `NotFound` when the parent is missing.
+        let write_result = match self.transport.write_file(&relpath, compressed) {
+            Err(io_err) if io_err.kind() == io::ErrorKind::NotFound => self
+                .transport
+                .create_dir(subdir_relpath(&hex_hash))
+                .and_then(|()| self.transport.write_file(&relpath, compressed)),
+            other => other,
+        };
+        write_result.or_else(|io_err| {
+            if io_err.kind() == io::ErrorKind::AlreadyExists {
+                // Perhaps it was simultaneously created by another thread or process.
+                ui::problem(&format!(
+                    "Unexpected late detection of existing block \"{}\"",
+                    hash
+                ));
+                Ok(())
+            } else {
+                Err(Error::WriteBlock {
+                    hash: hash.clone(),
+                    source: io_err,
+                })
+            }
+        })?;
         Ok(comp_len)
     }
 
     pub(crate) fn store_or_deduplicate(
         &mut self,
         block_data: &[u8],
+        compressor: &mut Compressor,
         stats: &mut BackupStats,
     ) -> Result<BlockHash> {
-        let hash = self.hash_bytes(block_data);
+        let hash = hash_bytes(block_data);
         if self.contains(&hash)? {
             stats.deduplicated_blocks += 1;
             stats.deduplicated_bytes += block_data.len() as u64;
         } else {
-            let comp_len = self.compress_and_store(block_data, &hash)?;
+            let comp_len = self.compress_and_store(block_data, &hash, compressor)?;
             stats.written_blocks += 1;
             stats.uncompressed_bytes += block_data.len() as u64;
             stats.compressed_bytes += comp_len;
@@ -176,12 +192,11 @@ impl BlockDir {
             });
         }
         if start != 0 {
-            let trimmed = decompressed[start..(start + len)].to_owned();
-            Ok((trimmed, sizes))
-        } else {
-            decompressed.truncate(len);
-            Ok((decompressed, sizes))
+            // Shift the wanted range down in place rather than copying it into a new buffer.
+            decompressed.copy_within(start..(start + len), 0);
         }
+        decompressed.truncate(len);
+        Ok((decompressed, sizes))
     }
 
     pub fn delete_block(&self, hash: &BlockHash) -> Result<()> {
@@ -285,21 +300,26 @@ impl BlockDir {
         let pb_mutex = Mutex::new(progress_bar);
         // Make a vec of Some(usize) if the block could be read, or None if it
         // failed, where the usize gives the uncompressed data size.
+        //
+        // Each worker keeps its own decompressor and read buffer, reused across all the
+        // blocks it checks.
         let results: Vec<Option<(BlockHash, usize)>> = blocks
             .into_par_iter()
-            // .into_iter()
-            .map(|hash| {
-                let r = self
-                    .get_block_content(&hash)
-                    .map(|(bytes, _sizes)| (hash, bytes.len()))
-                    .ok();
-                let mut pbl = pb_mutex.lock().unwrap();
-                pbl.increment_work_done(1);
-                if let Some(ref t) = r {
-                    pbl.increment_bytes_done(t.1 as u64);
-                }
-                r
-            })
+            .map_init(
+                || (Decompressor::new(), Vec::new()),
+                |(decompressor, compressed_bytes), hash| {
+                    let r = self
+                        .read_and_check_block(&hash, decompressor, compressed_bytes)
+                        .map(|sizes| (hash, sizes.uncompressed as usize))
+                        .ok();
+                    let mut pbl = pb_mutex.lock().unwrap();
+                    pbl.increment_work_done(1);
+                    if let Some(ref t) = r {
+                        pbl.increment_bytes_done(t.1 as u64);
+                    }
+                    r
+                },
+            )
             .collect();
         stats.block_error_count += results.iter().filter(|o| o.is_none()).count();
         let len_map: HashMap<BlockHash, usize> = results
@@ -313,43 +333,50 @@ impl BlockDir {
     ///
     /// Checks that the hash is correct with the contents.
     pub fn get_block_content(&self, hash: &BlockHash) -> Result<(Vec<u8>, Sizes)> {
-        // TODO: Reuse decompressor buffer.
-        // TODO: Reuse read buffer.
         let mut decompressor = Decompressor::new();
         let mut compressed_bytes = Vec::new();
+        let sizes = self.read_and_check_block(hash, &mut decompressor, &mut compressed_bytes)?;
+        Ok((decompressor.take_buffer(), sizes))
+    }
+
+    /// Read and decompress a block, and check its hash, using caller-provided buffers.
+    ///
+    /// On success the decompressed content is left in the decompressor.
+    fn read_and_check_block(
+        &self,
+        hash: &BlockHash,
+        decompressor: &mut Decompressor,
+        compressed_bytes: &mut Vec<u8>,
+    ) -> Result<Sizes> {
         let block_relpath = block_relpath(hash);
         self.transport
-            .read_file(&block_relpath, &mut compressed_bytes)
+            .read_file(&block_relpath, compressed_bytes)
             .map_err(|source| Error::ReadBlock {
                 source,
-                hash: hash.to_string(),
+                hash: hash.clone(),
             })?;
         let decompressed_bytes = decompressor.decompress(&compressed_bytes)?;
-        let actual_hash = BlockHash::from(blake2b::blake2b(
-            BLAKE_HASH_SIZE_BYTES,
-            &[],
-            &decompressed_bytes,
-        ));
+        let actual_hash = hash_bytes(&decompressed_bytes);
         if actual_hash != *hash {
             ui::problem(&format!(
                 "Block file {:?} has actual decompressed hash {}",
                 &block_relpath, actual_hash
             ));
             return Err(Error::BlockCorrupt {
-                hash: hash.to_string(),
-                actual_hash: actual_hash.to_string(),
+                hash: hash.clone(),
+                actual_hash,
             });
         }
-        let sizes = Sizes {
+        Ok(Sizes {
             uncompressed: decompressed_bytes.len() as u64,
             compressed: compressed_bytes.len() as u64,
-        };
-        Ok((decompressor.take_buffer(), sizes))
+        })
     }
+}
 
-    fn hash_bytes(&self, in_buf: &[u8]) -> BlockHash {
-        let mut hasher = Blake2b::new(BLAKE_HASH_SIZE_BYTES);
-        hasher.update(in_buf);
-        BlockHash::from(hasher.finalize())
-    }
+/// Return the hash identifying a block with the given uncompressed content.
+fn hash_bytes(in_buf: &[u8]) -> BlockHash {
+    let mut hasher = Blake2b::new(BLAKE_HASH_SIZE_BYTES);
+    hasher.update(in_buf);
+    BlockHash::from(hasher.finalize())
 }
@@ -21,7 +21,7 @@ use std::hash::{Hash, Hasher};
 use std::str::FromStr;
 
 use blake2_rfc::blake2b::Blake2bResult;
-use serde::{Deserialize, Serialize};
+use serde::{Deserialize, Serialize, Serializer};
 
 use crate::*;
 
@@ -29,8 +29,7 @@ use crate::*;
 ///
 /// Stored in memory as compact bytes, but translatable to and from
 /// hex strings.
-#[derive(Clone, Deserialize, Serialize)]
-#[serde(into = "String")]
+#[derive(Clone, Deserialize)]
 #[serde(try_from = "&str")]
 pub struct BlockHash {
     /// Binary hash.
@@ -80,9 +79,28 @@ impl Debug for BlockHash {
     }
 }
 
+impl BlockHash {
+    /// Encode as hex into a stack buffer rather than allocating a String for every hash.
+    fn encode_hex<'b>(&self, hex_buf: &'b mut [u8; BLAKE_HASH_SIZE_BYTES * 2]) -> &'b str {
+        hex::encode_to_slice(&self.bin[..], &mut hex_buf[..])
+            .expect("hex buffer is the right size");
+        std::str::from_utf8(hex_buf).expect("hex is ascii")
+    }
+}
+
 impl Display for BlockHash {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        write!(f, "{}", hex::encode(&self.bin[..]))
+        let mut hex_buf = [0u8; BLAKE_HASH_SIZE_BYTES * 2];
+        f.write_str(self.encode_hex(&mut hex_buf))
+    }
+}
+
+impl Serialize for BlockHash {
+    /// Serialized as a hex string, written straight from a stack buffer: index hunks
+    /// contain one hash per block address, so this avoids a clone and a String per hash.
+    fn serialize<S: Serializer>(&self, serializer: S) -> std::result::Result<S::Ok, S::Error> {
+        let mut hex_buf = [0u8; BLAKE_HASH_SIZE_BYTES * 2];
+        serializer.serialize_str(self.encode_hex(&mut hex_buf))
     }
 }
 
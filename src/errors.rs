@@ -25,17 +25,20 @@ type IOError = std::io::Error;
 /// Conserve specific error.
 #[derive(Debug, Error)]
 pub enum Error {
-    #[error("Block file {hash:?} corrupt; actual hash {actual_hash:?}")]
-    BlockCorrupt { hash: String, actual_hash: String },
+    #[error("Block file \"{hash}\" corrupt; actual hash \"{actual_hash}\"")]
+    BlockCorrupt {
+        hash: BlockHash,
+        actual_hash: BlockHash,
+    },
 
     #[error("{address:?} extends beyond decompressed block length {actual_len:?}")]
     AddressTooLong { address: Address, actual_len: usize },
 
-    #[error("Failed to write block {hash:?}")]
-    WriteBlock { hash: String, source: IOError },
+    #[error("Failed to write block \"{hash}\"")]
+    WriteBlock { hash: BlockHash, source: IOError },
 
-    #[error("Failed to read block {hash:?}")]
-    ReadBlock { hash: String, source: IOError },
+    #[error("Failed to read block \"{hash}\"")]
+    ReadBlock { hash: BlockHash, source: IOError },
 
     #[error("Failed to list block files")]
     ListBlocks { source: IOError },
@@ -104,6 +107,9 @@ pub enum Error {
     #[error("Failed to write index hunk {:?}", path)]
     WriteIndex { path: String, source: IOError },
 
+    #[error("Failed to list index directory")]
+    ListIndex { source: IOError },
+
     #[error("Failed to read index hunk {:?}", path)]
     ReadIndex { path: String, source: IOError },
 
@@ -19,11 +19,14 @@ use std::iter::Peekable;
 use std::path::Path;
 use std::vec;
 
+use serde::de::DeserializeOwned;
+use serde::Deserialize;
+
 use crate::compress::snappy::{Compressor, Decompressor};
 use crate::kind::Kind;
 use crate::stats::{IndexReadStats, IndexWriterStats};
 use crate::transport::local::LocalTransport;
-use crate::transport::Transport;
+use crate::transport::{ListDirNames, Transport};
 use crate::unix_time::UnixTime;
 use crate::*;
 
@@ -73,6 +76,20 @@ pub struct IndexEntry {
 }
 // GRCOV_EXCLUDE_STOP
 
+/// Just the block hashes of an index entry.
+///
+/// Deserializing into this skips over the other fields of the entry without building them.
+#[derive(Deserialize)]
+struct EntryBlockHashes {
+    #[serde(default)]
+    addrs: Vec<AddressHash>,
+}
+
+#[derive(Deserialize)]
+struct AddressHash {
+    hash: BlockHash,
+}
+
 impl Entry for IndexEntry {
     /// Return apath relative to the top of the tree.
     fn apath(&self) -> &Apath {
@@ -146,6 +163,9 @@ pub struct IndexWriter {
     pub stats: IndexWriterStats,
 
     compressor: Compressor,
+
+    /// Buffer for the uncompressed json of a hunk, reused across hunks.
+    json_buf: Vec<u8>,
 }
 
 /// Accumulate and write out index entries into files in an index directory.
@@ -159,6 +179,7 @@ impl IndexWriter {
             check_order: apath::DebugCheckOrder::new(),
             stats: IndexWriterStats::default(),
             compressor: Compressor::new(),
+            json_buf: Vec::new(),
         }
     }
 
@@ -204,21 +225,22 @@ impl IndexWriter {
             path: relpath.clone(),
             source,
         };
-        let json =
-            serde_json::to_vec(&self.entries).map_err(|source| Error::SerializeIndex { source })?;
+        self.json_buf.clear();
+        serde_json::to_writer(&mut self.json_buf, &self.entries)
+            .map_err(|source| Error::SerializeIndex { source })?;
         if (self.sequence % HUNKS_PER_SUBDIR) == 0 {
             self.transport
                 .create_dir(&subdir_relpath(self.sequence))
                 .map_err(write_error)?;
         }
-        let compressed_bytes = self.compressor.compress(&json)?;
+        let compressed_bytes = self.compressor.compress(&self.json_buf)?;
         self.transport
             .write_file(&relpath, compressed_bytes)
             .map_err(write_error)?;
 
         self.stats.index_hunks += 1;
         self.stats.compressed_index_bytes += compressed_bytes.len() as u64;
-        self.stats.uncompressed_index_bytes += json.len() as u64;
+        self.stats.uncompressed_index_bytes += self.json_buf.len() as u64;
         self.entries.clear(); // Ready for the next hunk.
         self.sequence += 1;
         Ok(())
@@ -230,6 +252,15 @@ fn subdir_relpath(hunk_number: u32) -> String {
     format!("{:05}", hunk_number / HUNKS_PER_SUBDIR)
 }
 
+/// Parse a name made of exactly `width` decimal digits, as written by `hunk_relpath`.
+fn parse_padded_number(name: &str, width: usize) -> Option<u32> {
+    if name.len() == width && name.bytes().all(|b| b.is_ascii_digit()) {
+        name.parse().ok()
+    } else {
+        None
+    }
+}
+
 /// Return the relative path for a hunk.
 fn hunk_relpath(hunk_number: u32) -> String {
     format!("{:05}/{:09}", hunk_number / HUNKS_PER_SUBDIR, hunk_number)
@@ -252,22 +283,50 @@ impl IndexRead {
     }
 
     /// Return the (1-based) number of index hunks in an index directory.
+    ///
+    /// Hunks are counted up to the first missing hunk number, by listing the index
+    /// subdirectories rather than probing for each hunk in turn.
     pub fn count_hunks(&self) -> Result<u32> {
-        // TODO: Might be faster to list the directory than to probe for all of them.
-        // TODO: Perhaps, list the directories and cope cleanly with
-        // one hunk being missing.
-        for i in 0.. {
-            let path = hunk_relpath(i);
-            if !self
-                .transport
-                .exists(&path)
-                .map_err(|source| Error::ReadIndex { source, path })?
-            {
-                // If hunk 1 is missing, 1 hunks exists.
-                return Ok(i);
-            }
+        // TODO: Perhaps cope cleanly with one hunk being missing.
+        let subdirs = match self.transport.list_dir_names("") {
+            Ok(ListDirNames { dirs, .. }) => dirs,
+            Err(source) if source.kind() == io::ErrorKind::NotFound => return Ok(0),
+            Err(source) => return Err(Error::ListIndex { source }),
+        };
+        let mut hunks = Vec::<u32>::new();
+        for subdir in subdirs {
+            // Only count names in exactly the form written by `hunk_relpath`, since those
+            // are the only ones `IndexHunkIter` will read.
+            let subdir_number = match parse_padded_number(&subdir, 5) {
+                Some(n) => n,
+                None => continue,
+            };
+            let files = match self.transport.list_dir_names(&subdir) {
+                Ok(ListDirNames { files, .. }) => files,
+                Err(err) => {
+                    // Skip this directory rather than failing the whole count; its hunks
+                    // will be reported as errors when they're read.
+                    ui::problem(&format!(
+                        "Failed to list index directory {:?}: {:?}",
+                        subdir, err
+                    ));
+                    continue;
+                }
+            };
+            hunks.extend(
+                files
+                    .iter()
+                    .filter_map(|name| parse_padded_number(name, 9))
+                    .filter(|hunk| hunk / HUNKS_PER_SUBDIR == subdir_number),
+            );
         }
-        unreachable!();
+        hunks.sort_unstable();
+        // If hunk 1 is missing, 1 hunks exists.
+        Ok(hunks
+            .iter()
+            .zip(0..)
+            .take_while(|(hunk, i)| **hunk == *i)
+            .count() as u32)
     }
 
     pub fn estimate_entry_count(&self) -> Result<u64> {
@@ -279,6 +338,18 @@ impl IndexRead {
         IndexEntryIter::new(self.iter_hunks(), None, excludes_nothing())
     }
 
+    /// Make an iterator over the hashes of all blocks referenced by this index.
+    ///
+    /// This is cheaper than `iter_entries` when only the blocks are needed, because
+    /// the other fields of each entry are never built.
+    pub(crate) fn iter_block_hashes(self) -> impl Iterator<Item = BlockHash> {
+        let mut hunk_iter = self.iter_hunks();
+        std::iter::from_fn(move || hunk_iter.next_hunk_as::<EntryBlockHashes>())
+            .flatten()
+            .flat_map(|entry| entry.addrs)
+            .map(|addr| addr.hash)
+    }
+
     /// Make an iterator that returns hunks of entries from this index.
     pub fn iter_hunks(&self) -> IndexHunkIter {
         IndexHunkIter {
@@ -311,19 +382,7 @@ impl Iterator for IndexHunkIter {
 
     fn next(&mut self) -> Option<Self::Item> {
         loop {
-            let hunk_number = self.next_hunk_number;
-            let entries = match self.read_next_hunk() {
-                Ok(None) => return None,
-                Ok(Some(entries)) => entries,
-                Err(err) => {
-                    self.stats.errors += 1;
-                    ui::problem(&format!(
-                        "Error reading index hunk {:?}: {:?} ",
-                        hunk_number, err
-                    ));
-                    continue;
-                }
-            };
+            let entries: Vec<IndexEntry> = self.next_hunk_as()?;
             if let Some(ref after) = self.after {
                 if let Some(last) = entries.last() {
                     if last.apath <= *after {
@@ -358,7 +417,27 @@ impl IndexHunkIter {
         }
     }
 
-    fn read_next_hunk(&mut self) -> Result<Option<Vec<IndexEntry>>> {
+    /// Return the next readable hunk, deserialized as `T`.
+    ///
+    /// Hunks that can't be read are counted and reported, and skipped.
+    fn next_hunk_as<T: DeserializeOwned>(&mut self) -> Option<Vec<T>> {
+        loop {
+            let hunk_number = self.next_hunk_number;
+            match self.read_next_hunk() {
+                Ok(None) => return None,
+                Ok(Some(entries)) => return Some(entries),
+                Err(err) => {
+                    self.stats.errors += 1;
+                    ui::problem(&format!(
+                        "Error reading index hunk {:?}: {:?} ",
+                        hunk_number, err
+                    ));
+                }
+            }
+        }
+    }
+
+    fn read_next_hunk<T: DeserializeOwned>(&mut self) -> Result<Option<Vec<T>>> {
         let path = &hunk_relpath(self.next_hunk_number);
         // Whether we succeed or fail, don't try to read this hunk again.
         self.next_hunk_number += 1;
@@ -379,7 +458,7 @@ impl IndexHunkIter {
         self.stats.compressed_index_bytes += self.compressed_buf.len() as u64;
         let index_bytes = self.decompressor.decompress(&self.compressed_buf)?;
         self.stats.uncompressed_index_bytes += index_bytes.len() as u64;
-        let entries: Vec<IndexEntry> =
+        let entries: Vec<T> =
             serde_json::from_slice(&index_bytes).map_err(|source| Error::DeserializeIndex {
                 path: path.clone(),
                 source,
@@ -600,6 +679,35 @@ mod tests {
         assert!(it.next().is_none(), "Expected no more entries");
     }
 
+    #[test]
+    fn iter_block_hashes() {
+        let (testdir, mut ib) = setup();
+        let hash_a: BlockHash = "aa".repeat(BLAKE_HASH_SIZE_BYTES).parse().unwrap();
+        let hash_b: BlockHash = "bb".repeat(BLAKE_HASH_SIZE_BYTES).parse().unwrap();
+        let mut stored = sample_entry("/apple");
+        stored.addrs = vec![
+            blockdir::Address {
+                hash: hash_a.clone(),
+                start: 0,
+                len: 10,
+            },
+            blockdir::Address {
+                hash: hash_b.clone(),
+                start: 10,
+                len: 20,
+            },
+        ];
+        ib.append_entries(&mut vec![sample_entry("/aaa"), stored]);
+        ib.finish_hunk().unwrap();
+        ib.append_entries(&mut vec![sample_entry("/banana")]);
+        ib.finish().unwrap();
+
+        let hashes: Vec<BlockHash> = IndexRead::open_path(&testdir.path())
+            .iter_block_hashes()
+            .collect();
+        assert_eq!(hashes, [hash_a, hash_b]);
+    }
+
     #[test]
     fn multiple_hunks() {
         let (testdir, mut ib) = setup();
@@ -769,4 +877,26 @@ mod tests {
         assert_eq!(read_index.count_hunks()?, 1);
         Ok(())
     }
+
+    #[test]
+    fn count_hunks_stops_at_first_missing_hunk() -> Result<()> {
+        let (testdir, mut ib) = setup();
+        for i in 0..4 {
+            ib.push_entry(sample_entry(&format!("/{:0>10}", i)));
+            ib.finish_hunk()?;
+        }
+        let read_index = IndexRead::open_path(&testdir.path());
+        assert_eq!(read_index.count_hunks()?, 4);
+
+        // Names that parse as numbers but aren't in the written form are ignored.
+        std::fs::write(testdir.path().join("00000").join("4"), b"").unwrap();
+        std::fs::write(testdir.path().join("00000").join("+00000004"), b"").unwrap();
+        std::fs::create_dir(testdir.path().join("0")).unwrap();
+        std::fs::write(testdir.path().join("0").join("000000004"), b"").unwrap();
+        assert_eq!(read_index.count_hunks()?, 4);
+
+        std::fs::remove_file(testdir.path().join(hunk_relpath(2))).unwrap();
+        assert_eq!(read_index.count_hunks()?, 2);
+        Ok(())
+    }
 }
@@ -39,16 +39,30 @@ pub(crate) fn read_with_retries(
     len: usize,
     from_file: &mut dyn Read,
 ) -> std::io::Result<()> {
-    // TODO: This could safely resize the buf without initializing, since it will be overwritten.
-    buf.resize(len, 0);
-    let mut bytes_read = 0;
-    while bytes_read < len {
-        let read_len = from_file.read(&mut buf[bytes_read..])?;
-        if read_len == 0 {
-            break;
-        }
-        bytes_read += read_len;
-    }
-    buf.truncate(bytes_read);
+    // `read_to_end` keeps reading until EOF, retrying on interruption, and reads directly
+    // into the spare capacity rather than requiring us to zero-fill the buffer first.
+    buf.clear();
+    buf.reserve(len);
+    from_file.take(len as u64).read_to_end(buf)?;
     Ok(())
 }
+
+#[cfg(test)]
+mod test {
+    use super::*;
+
+    #[test]
+    fn read_with_retries_limits_length_and_reuses_buffer() {
+        let content = b"0123456789";
+        let mut buf = b"previous contents".to_vec();
+        let mut from_file: &[u8] = content;
+        read_with_retries(&mut buf, 4, &mut from_file).unwrap();
+        assert_eq!(buf, b"0123");
+        read_with_retries(&mut buf, 4, &mut from_file).unwrap();
+        assert_eq!(buf, b"4567");
+        read_with_retries(&mut buf, 4, &mut from_file).unwrap();
+        assert_eq!(buf, b"89");
+        read_with_retries(&mut buf, 4, &mut from_file).unwrap();
+        assert!(buf.is_empty());
+    }
+}
@@ -202,6 +202,12 @@ impl Iter {
         self.stats.directories_visited += 1;
         let mut children = Vec::<(String, LiveEntry)>::new();
         let dir_path = relative_path(&self.root_path, parent_apath);
+        // Every child's apath starts with the same prefix, so build it once per directory.
+        // TODO: Specific Apath join method?
+        let mut child_apath_prefix = parent_apath.to_string();
+        if child_apath_prefix != "/" {
+            child_apath_prefix.push('/');
+        }
         let dir_iter = match fs::read_dir(&dir_path) {
             Ok(i) => i,
             Err(e) => {
@@ -220,11 +226,6 @@ impl Iter {
                     continue;
                 }
             };
-            let mut child_apath_str = parent_apath.to_string();
-            // TODO: Specific Apath join method?
-            if child_apath_str != "/" {
-                child_apath_str.push('/');
-            }
             let child_osstr = &dir_entry.file_name();
             let child_name = match child_osstr.to_str() {
                 Some(c) => c,
@@ -236,6 +237,9 @@ impl Iter {
                     continue;
                 }
             };
+            let mut child_apath_str =
+                String::with_capacity(child_apath_prefix.len() + child_name.len());
+            child_apath_str.push_str(&child_apath_prefix);
             child_apath_str.push_str(child_name);
             let ft = match dir_entry.file_type() {
                 Ok(ft) => ft,
@@ -18,7 +18,7 @@ use std::{borrow::Cow, fmt::Write};
 
 use thousands::Separable;
 
-use crate::ui::with_locked_ui;
+use crate::ui::{progress_enabled, with_locked_ui};
 
 const PROGRESS_RATE_LIMIT: Duration = Duration::from_millis(200);
 
@@ -59,8 +59,13 @@ impl<'a> ProgressBar<'a> {
         self.maybe_redraw();
     }
 
-    pub fn set_filename(&mut self, filename: String) {
-        self.filename = filename;
+    /// Set the filename currently being processed.
+    ///
+    /// The name is copied into a buffer owned by the bar, so callers can pass a borrowed
+    /// path without allocating a new String for every file.
+    pub fn set_filename<S: AsRef<str>>(&mut self, filename: S) {
+        self.filename.clear();
+        self.filename.push_str(filename.as_ref());
         self.maybe_redraw();
     }
 
@@ -103,6 +108,9 @@ impl<'a> ProgressBar<'a> {
     }
 
     fn maybe_redraw(&mut self) {
+        if !progress_enabled() {
+            return;
+        }
         if let Some(last) = self.last_drawn {
             if last.elapsed() < PROGRESS_RATE_LIMIT {
                 return;
@@ -14,7 +14,7 @@
 
 use std::fs::File;
 use std::io;
-use std::io::Write;
+use std::io::{BufWriter, Write};
 use std::path::{Path, PathBuf};
 use std::{fs, time::Instant};
 
@@ -85,7 +85,7 @@ pub fn restore(
         if options.print_filenames {
             crate::ui::println(entry.apath());
         }
-        progress_bar.set_filename(entry.apath().to_string());
+        progress_bar.set_filename(entry.apath());
         if let Err(e) = match entry.kind() {
             Kind::Dir => {
                 stats.directories += 1;
@@ -192,14 +192,20 @@ impl RestoreTree {
             path: path.clone(),
             source,
         };
-        let mut restore_file = File::create(&path).map_err(restore_err)?;
+        // `io::copy` moves data in small chunks, so buffer up to a whole block to
+        // write each one in a single call.
+        let buf_size = source_entry.size().map_or(MAX_BLOCK_SIZE, |s| {
+            std::cmp::min(s as usize, MAX_BLOCK_SIZE)
+        });
+        let mut restore_file =
+            BufWriter::with_capacity(buf_size, File::create(&path).map_err(restore_err)?);
         // TODO: Read one block at a time: don't pull all the contents into memory.
         let content = &mut from_tree.file_contents(&source_entry)?;
         let bytes_copied = std::io::copy(content, &mut restore_file).map_err(restore_err)?;
         restore_file.flush().map_err(restore_err)?;
 
         let mtime = Some(source_entry.mtime().into());
-        set_file_handle_times(&restore_file, mtime, mtime).map_err(|source| {
+        set_file_handle_times(restore_file.get_ref(), mtime, mtime).map_err(|source| {
             Error::RestoreModificationTime {
                 path: path.clone(),
                 source,
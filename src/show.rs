@@ -19,6 +19,9 @@
 use std::borrow::Cow;
 use std::io::{BufWriter, Write};
 
+use chrono::format::{Item, StrftimeItems};
+use serde::Serializer;
+
 use crate::*;
 
 /// Options controlling the behavior of `show_versions`.
@@ -47,13 +50,15 @@ pub fn show_versions(
     if options.newest_first {
         band_ids.reverse();
     }
+    let mut bw = BufWriter::new(w);
+    let names_only = !(options.tree_size || options.start_time || options.backup_duration);
+    // Parse the time format once, rather than again for every band.
+    let time_format: Vec<Item> = StrftimeItems::new(crate::TIMESTAMP_FORMAT).collect();
     for band_id in band_ids {
-        if !(options.tree_size || options.start_time || options.backup_duration) {
-            writeln!(w, "{}", band_id)?;
+        if names_only {
+            writeln!(bw, "{}", band_id)?;
             continue;
         }
-        let mut l: Vec<String> = Vec::new();
-        l.push(format!("{:<20}", band_id));
         let band = match Band::open(&archive, &band_id) {
             Ok(band) => band,
             Err(e) => {
@@ -69,16 +74,33 @@ pub fn show_versions(
             }
         };
 
+        // Measure the tree before writing anything, so that an error doesn't leave a
+        // partial line.
+        let tree_mb_str = if options.tree_size {
+            Some(crate::misc::bytes_to_human_mb(
+                archive
+                    .open_stored_tree(BandSelectionPolicy::Specified(band_id.clone()))?
+                    .size(excludes_nothing())?
+                    .file_bytes,
+            ))
+        } else {
+            None
+        };
+
+        // Write each column straight into the buffered output, rather than formatting
+        // them into separate strings and joining them.
+        write!(bw, "{:<20}", band_id)?;
+
         if options.start_time {
             let start_time = info.start_time;
             let start_time_str = if options.utc {
-                start_time.format(crate::TIMESTAMP_FORMAT)
+                start_time.format_with_items(time_format.iter())
             } else {
                 start_time
                     .with_timezone(&chrono::Local)
-                    .format(crate::TIMESTAMP_FORMAT)
+                    .format_with_items(time_format.iter())
             };
-            l.push(format!("{:<10}", start_time_str));
+            write!(bw, " {:<10}", start_time_str)?;
         }
 
         if options.backup_duration {
@@ -91,30 +113,31 @@ pub fn show_versions(
             } else {
                 Cow::Borrowed("incomplete")
             };
-            l.push(format!("{:>10}", duration_str));
+            write!(bw, " {:>10}", duration_str)?;
         }
 
-        if options.tree_size {
-            let tree_mb_str = crate::misc::bytes_to_human_mb(
-                archive
-                    .open_stored_tree(BandSelectionPolicy::Specified(band_id.clone()))?
-                    .size(excludes_nothing())?
-                    .file_bytes,
-            );
-            l.push(format!("{:>14}", tree_mb_str,));
+        if let Some(tree_mb_str) = tree_mb_str {
+            write!(bw, " {:>14}", tree_mb_str)?;
         }
 
-        writeln!(w, "{}", l.join(" "))?;
+        writeln!(bw)?;
+        // Rows with per-band columns can each take a while to compute, so show them as
+        // they're ready, and keep them ordered with problems reported to the terminal.
+        bw.flush()?;
     }
+    bw.flush()?;
     Ok(())
 }
 
 pub fn show_index_json(band: &Band, w: &mut dyn Write) -> Result<()> {
-    // TODO: Maybe use https://docs.serde.rs/serde/ser/trait.Serializer.html#method.collect_seq.
-    let bw = BufWriter::new(w);
-    let index_entries: Vec<IndexEntry> = band.index().iter_entries().collect();
-    serde_json::ser::to_writer_pretty(bw, &index_entries)
-        .map_err(|source| Error::SerializeIndex { source })
+    // Stream entries out as they're read, rather than collecting the whole index into memory.
+    let mut bw = BufWriter::new(w);
+    let mut serializer = serde_json::Serializer::pretty(&mut bw);
+    serializer
+        .collect_seq(band.index().iter_entries())
+        .map_err(|source| Error::SerializeIndex { source })?;
+    bw.flush()?;
+    Ok(())
 }
 
 pub fn show_entry_names<E: Entry, I: Iterator<Item = E>>(it: I, w: &mut dyn Write) -> Result<()> {
@@ -95,6 +95,9 @@ pub trait Transport: Send + Sync + std::fmt::Debug {
     /// then renamed.
     ///
     /// If a temporary file is used, the name should start with `crate::TMP_PREFIX`.
+    ///
+    /// If the parent directory does not exist, this must fail with `io::ErrorKind::NotFound`:
+    /// the block dir relies on that to create block subdirectories only when they're missing.
     fn write_file(&self, relpath: &str, content: &[u8]) -> io::Result<()>;
 
     /// Get metadata about a file.
@@ -12,7 +12,6 @@
 
 //! Access to an archive on the local filesystem.
 
-use std::convert::TryInto;
 use std::fs::{create_dir, File};
 use std::io;
 use std::io::prelude::*;
@@ -62,13 +61,10 @@ impl Transport for LocalTransport {
 
     fn read_file(&self, relpath: &str, out_buf: &mut Vec<u8>) -> io::Result<()> {
         out_buf.truncate(0);
-        // read_to_end reads in gradually increasing parts, but here we can probably read one large
-        // buffer.
         let mut file = File::open(&self.full_path(relpath))?;
-        let prefetch_len: usize = file.metadata()?.len().try_into().unwrap();
-        out_buf.resize(prefetch_len, 0);
-        let actual_len = file.read(out_buf)?;
-        out_buf.truncate(actual_len);
+        // read_to_end sizes the buffer from the file's length, reads without zero-filling,
+        // and keeps reading if the OS returns a short read.
+        file.read_to_end(out_buf)?;
         Ok(())
     }
 
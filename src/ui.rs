@@ -17,6 +17,7 @@ use std::borrow::Cow;
 use std::fmt::Write;
 use std::io;
 use std::io::Write as IoWrite;
+use std::sync::atomic::{AtomicBool, Ordering};
 use std::sync::Mutex;
 use std::time::Duration;
 
@@ -34,22 +35,23 @@ use crate::ProgressBar;
 ///
 /// Progress bars are only drawn when the application requests them with
 /// `enable_progress` and the output destination is a tty that's capable
-/// of redrawing.
+/// of redrawing. Whether they're enabled is kept outside the state, in
+/// `PROGRESS_ENABLED`, so that progress updates can skip taking the lock.
 ///
 /// So this class also works when stdout is redirected to a file, in
 /// which case it will get only messages and no progress bar junk.
 pub(crate) struct UIState {
     /// Is a progress bar currently on the screen?
     progress_present: bool,
-
-    /// Should a progress bar be drawn?
-    progress_enabled: bool,
 }
 
 lazy_static! {
     static ref UI_STATE: Mutex<UIState> = Mutex::new(UIState::default());
 }
 
+/// Should a progress bar be drawn?
+static PROGRESS_ENABLED: AtomicBool = AtomicBool::new(false);
+
 // TODO: Rather than a directly-called function, hook this into logging.
 pub fn println(s: &str) {
     with_locked_ui(|ui| ui.println(s))
@@ -87,15 +89,20 @@ pub fn show_error(e: &dyn std::error::Error) {
 /// Progress bars are off by default.
 pub fn enable_progress(enabled: bool) {
     use crossterm::tty::IsTty;
-    let mut ui = UI_STATE.lock().unwrap();
-    ui.progress_enabled = io::stdout().is_tty() && enabled;
+    PROGRESS_ENABLED.store(io::stdout().is_tty() && enabled, Ordering::Relaxed);
+}
+
+/// True if progress bars should be drawn.
+///
+/// This doesn't take the UI lock, so it's cheap enough to check on every progress update.
+pub(crate) fn progress_enabled() -> bool {
+    PROGRESS_ENABLED.load(Ordering::Relaxed)
 }
 
 impl Default for UIState {
     fn default() -> UIState {
         UIState {
             progress_present: false,
-            progress_enabled: false,
         }
     }
 }
@@ -156,7 +163,7 @@ impl UIState {
     }
 
     pub(crate) fn draw_progress_bar(&mut self, bar: &ProgressBar) {
-        if !self.progress_enabled {
+        if !progress_enabled() {
             return;
         }
         let width = if let Ok((width, _)) = terminal::size() {
@@ -13,6 +13,8 @@
 use std::collections::HashMap;
 use std::{cmp::max, sync::Mutex};
 
+use rayon::prelude::*;
+
 use crate::blockdir::Address;
 use crate::*;
 
@@ -31,11 +33,10 @@ impl BlockLengths {
 
     fn add(&mut self, addr: Address) {
         let end = addr.start + addr.len;
-        if let Some(al) = self.0.get_mut(&addr.hash) {
-            *al = max(*al, end)
-        } else {
-            self.0.insert(addr.hash, end);
-        }
+        self.0
+            .entry(addr.hash)
+            .and_modify(|al| *al = max(*al, end))
+            .or_insert(end);
     }
 
     fn update(&mut self, b: BlockLengths) {
@@ -47,45 +48,60 @@ impl BlockLengths {
         }
     }
 }
+/// Validate the indexes of the given bands, and collect the lengths of the blocks they reference.
+///
+/// Bands are checked in parallel, and their results merged.
 pub(crate) fn validate_bands(
     archive: &Archive,
     band_ids: &[BandId],
 ) -> (BlockLengths, ValidateStats) {
-    let mut stats = ValidateStats::default();
-    let mut block_lens = BlockLengths::new();
-
     let mut progress_bar = ProgressBar::new();
     progress_bar.set_phase("Check index");
     progress_bar.set_total_work(band_ids.len());
     let pb_mutex = Mutex::new(progress_bar);
 
-    for band_id in band_ids {
-        if let Ok(b) = Band::open(archive, &band_id) {
-            if b.validate(&mut stats).is_err() {
-                stats.band_metadata_problems += 1;
+    band_ids
+        .par_iter()
+        .map(|band_id| {
+            let r = validate_band(archive, band_id);
+            if let Ok(mut pb_lock) = pb_mutex.lock() {
+                pb_lock.increment_work_done(1);
             }
-        } else {
-            stats.band_open_errors += 1;
-            continue;
-        }
+            r
+        })
+        .reduce(
+            || (BlockLengths::new(), ValidateStats::default()),
+            |(mut block_lens, mut stats), (band_block_lens, band_stats)| {
+                block_lens.update(band_block_lens);
+                stats += band_stats;
+                (block_lens, stats)
+            },
+        )
+}
 
-        if let Ok(st) = archive.open_stored_tree(BandSelectionPolicy::Specified(band_id.clone())) {
-            if let Ok((st_block_lens, st_stats)) = validate_stored_tree(&st) {
-                stats += st_stats;
-                block_lens.update(st_block_lens);
-            } else {
-                stats.tree_validate_errors += 1
-            }
-        } else {
-            stats.tree_open_errors += 1;
-            continue;
+fn validate_band(archive: &Archive, band_id: &BandId) -> (BlockLengths, ValidateStats) {
+    let mut stats = ValidateStats::default();
+
+    if let Ok(b) = Band::open(archive, &band_id) {
+        if b.validate(&mut stats).is_err() {
+            stats.band_metadata_problems += 1;
         }
+    } else {
+        stats.band_open_errors += 1;
+        return (BlockLengths::new(), stats);
+    }
 
-        if let Ok(mut pb_lock) = pb_mutex.lock() {
-            pb_lock.increment_work_done(1);
+    if let Ok(st) = archive.open_stored_tree(BandSelectionPolicy::Specified(band_id.clone())) {
+        if let Ok((st_block_lens, st_stats)) = validate_stored_tree(&st) {
+            stats += st_stats;
+            return (st_block_lens, stats);
+        } else {
+            stats.tree_validate_errors += 1
         }
+    } else {
+        stats.tree_open_errors += 1;
     }
-    (block_lens, stats)
+    (BlockLengths::new(), stats)
 }
 
 pub(crate) fn validate_stored_tree(st: &StoredTree) -> Result<(BlockLengths, ValidateStats)> {
@@ -35,6 +35,13 @@ fn is_prefix_of() {
     assert!(Apath::from("/this")
         .is_prefix_of(&Apath::from("/that/other"))
         .not());
+    assert!(Apath::from("/caf\u{e9}").is_prefix_of(&Apath::from("/caf\u{e9}/menu")));
+    assert!(Apath::from("/caf\u{e9}")
+        .is_prefix_of(&Apath::from("/caf\u{e9}s"))
+        .not());
+    assert!(Apath::from("/caf\u{e9}")
+        .is_prefix_of(&Apath::from("/caf\u{e9}s/x"))
+        .not());
 }
 
 #[test]